@@ -8,26 +8,41 @@ Simple YouTube Video Uploader
 - GitHub Actions compatible
 """
 
+import io
 import os
 import sys
 import json
+import hashlib
 import pickle
+import shelve
+import mmap
+import tempfile
 import requests
 import re
-from datetime import datetime, timedelta
+import time
+import queue
+import threading
+from http.client import IncompleteRead
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# Google API imports
+# orjson is much faster for the tracker file; stdlib json works fine without it
 try:
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaFileUpload
-    from google.auth.transport.requests import Request
+    import orjson
 except ImportError:
-    print("📦 Installing required packages...")
-    os.system(f"{sys.executable} -m pip install -q google-auth-oauthlib google-auth-httplib2 google-api-python-client gdown")
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaFileUpload
-    from google.auth.transport.requests import Request
+    orjson = None
+
+SCOPES = [
+    'https://www.googleapis.com/auth/youtube.upload',
+    'https://www.googleapis.com/auth/youtube.readonly'
+]
+
+# Matches /file/d/<id>, id=<id> and /d/<id> Drive URL styles in one pass
+_DRIVE_ID_RE = re.compile(r'(?:/file/d/|id=|/d/)([A-Za-z0-9_-]+)')
 
 class YouTubeUploader:
     def __init__(self):
@@ -40,24 +55,103 @@ class YouTubeUploader:
         self.schedule_time = "20:00"  # 8 PM
         self.schedule_gap_minutes = 15
         self.schedule_months_ahead = 6
-        
+
+        # Parse once; reused for every video
+        self._sched_hour, self._sched_minute = map(int, self.schedule_time.split(':'))
+        self._bd_tz = timezone(timedelta(hours=6))  # Bangladesh (no DST)
+        self._base_now = None  # captured once per run()
+        self._sched_date_str = None  # schedule date, formatted once per run()
+
         # Files
-        self.token_file = "youtube_token.pickle"
+        self.token_file = "youtube_token.json"
+        self.legacy_token_file = "youtube_token.pickle"
         self.videos_file = "videos.txt"
         self.tracker_file = "tracker.json"
+        self.history_file = "tracker_history.jsonl"
+        self.api_cache_file = "api_cache"
         
         # Initialize
         self.youtube = None
+        self.creds = None
         self.tracker = {}
+
+        # httplib2 is not thread-safe; worker threads get their own
+        # authorized transport via _thread_http()
+        self._http_local = threading.local()
+
+        # Post-upload metadata calls (videos().update, thumbnails().set, ...)
+        # are collected here and sent as one HTTP batch at the end of the run
+        self._batch_lock = threading.Lock()
+        self._pending_batch = []
+
+        # Pooled HTTP session (keep-alive + retries for IP/metadata lookups)
+        self.http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
     
     def save_tracker(self):
         """Save progress"""
-        with open(self.tracker_file, 'w') as f:
-            json.dump(self.tracker, f, indent=2)
+        if orjson is not None:
+            with open(self.tracker_file, 'wb') as f:
+                f.write(orjson.dumps(self.tracker, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.tracker_file, 'w') as f:
+                json.dump(self.tracker, f, indent=2)
+
+    def append_history(self, entry):
+        """Append one run's record to the append-only history log"""
+        if orjson is not None:
+            line = orjson.dumps(entry)
+        else:
+            line = json.dumps(entry).encode()
+
+        with open(self.history_file, 'ab') as f:
+            f.write(line + b'\n')
     
+    async def _async_ip_info(self, apis):
+        """Probe all IP services on one async client, return first hit"""
+        import asyncio
+        import httpx
+
+        limits = httpx.Limits(max_keepalive_connections=8)
+        try:
+            client = httpx.AsyncClient(http2=True, limits=limits, timeout=4)
+        except ImportError:
+            # http2 extra (h2) not installed - plain HTTP/1.1 still pools
+            client = httpx.AsyncClient(limits=limits, timeout=4)
+
+        async with client:
+            tasks = [asyncio.create_task(client.get(api)) for api in apis]
+            try:
+                for coro in asyncio.as_completed(tasks, timeout=4):
+                    try:
+                        data = (await coro).json()
+                    except Exception:
+                        continue
+
+                    ip = data.get('ip') or data.get('ip_addr')
+                    if ip:
+                        return ip
+            except asyncio.TimeoutError:
+                print("⚠️ IP detection timed out")
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return None
+
     def get_my_ip_info(self):
         """Get upload IP and location - Multiple fallback APIs"""
-        
+
         # Try multiple IP detection services
         apis = [
             'https://api.ipify.org?format=json',
@@ -75,30 +169,64 @@ class YouTubeUploader:
             'org': 'Unknown'
         }
         
-        # First, get IP address
-        for api in apis[:2]:
-            try:
-                print(f"🔍 Checking IP from: {api.split('/')[2]}")
-                response = requests.get(api, timeout=10)
-                data = response.json()
-                
+        # First, get IP address - probe all services at once, take the fastest.
+        # With httpx installed the probes share one async client (no thread
+        # per request); otherwise fall back to the thread pool.
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            httpx = None
+
+        print(f"🔍 Checking IP from {len(apis)} services...")
+
+        if httpx is not None:
+            import asyncio
+            ip = asyncio.run(self._async_ip_info(apis))
+            if ip:
+                ip_info['ip'] = ip
+                print(f"✅ IP detected: {ip}")
+            return self._finish_ip_info(ip_info)
+
+        executor = ThreadPoolExecutor(max_workers=len(apis))
+        futures = {
+            executor.submit(self.http.get, api, timeout=(3, 7)): api
+            for api in apis
+        }
+
+        try:
+            for future in as_completed(futures, timeout=4):
+                api = futures[future]
+                try:
+                    data = future.result().json()
+                except Exception as e:
+                    print(f"⚠️ Failed ({api.split('/')[2]}): {str(e)[:50]}")
+                    continue
+
                 if 'ip' in data:
                     ip_info['ip'] = data['ip']
-                    print(f"✅ IP detected: {ip_info['ip']}")
-                    break
                 elif 'ip_addr' in data:
                     ip_info['ip'] = data['ip_addr']
-                    print(f"✅ IP detected: {ip_info['ip']}")
-                    break
-            except Exception as e:
-                print(f"⚠️ Failed: {str(e)[:50]}")
-                continue
-        
-        # Then, get location info
+                else:
+                    continue
+
+                print(f"✅ IP detected: {ip_info['ip']} (via {api.split('/')[2]})")
+                break
+        except FuturesTimeoutError:
+            print("⚠️ IP detection timed out")
+        finally:
+            # Don't join in-flight probes - a winner (or the deadline) is
+            # enough, and a hung endpoint would otherwise stall us for its
+            # full timeout; slow losers finish in the background.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return self._finish_ip_info(ip_info)
+
+    def _finish_ip_info(self, ip_info):
+        """Fill in location details for a detected IP"""
         if ip_info['ip'] != 'Unknown':
             try:
                 print(f"🌍 Getting location info...")
-                response = requests.get(f'http://ip-api.com/json/{ip_info["ip"]}', timeout=10)
+                response = self.http.get(f'http://ip-api.com/json/{ip_info["ip"]}', timeout=(3, 7))
                 data = response.json()
                 
                 if data.get('status') == 'success':
@@ -115,37 +243,86 @@ class YouTubeUploader:
     def authenticate(self):
         """Authenticate with YouTube API"""
         print("\n🔐 Authenticating...")
-        
-        if not os.path.exists(self.token_file):
-            print(f"❌ Token file not found: {self.token_file}")
-            print("💡 Please upload youtube_token.pickle to the repo")
-            sys.exit(1)
-        
+
+        # Google API imports live here so the startup banner and IP check
+        # don't pay for them (~200ms of cold-start import time)
         try:
-            with open(self.token_file, 'rb') as token:
-                creds = pickle.load(token)
-            
+            from googleapiclient.discovery import build
+            from google.auth.transport.requests import Request
+            from google.oauth2.credentials import Credentials
+        except ImportError:
+            print("📦 Installing required packages...")
+            os.system(f"{sys.executable} -m pip install -q google-auth-oauthlib google-auth-httplib2 google-api-python-client gdown")
+            from googleapiclient.discovery import build
+            from google.auth.transport.requests import Request
+            from google.oauth2.credentials import Credentials
+
+        try:
+            # One-time migration from the legacy pickle token
+            migrated = False
+            if not os.path.exists(self.token_file) and os.path.exists(self.legacy_token_file):
+                print(f"🔄 Migrating {self.legacy_token_file} → {self.token_file}...")
+                with open(self.legacy_token_file, 'rb') as token:
+                    creds = pickle.load(token)
+                with open(self.token_file, 'w') as f:
+                    f.write(creds.to_json())
+                migrated = True
+
+            if not os.path.exists(self.token_file):
+                print(f"❌ Token file not found: {self.token_file}")
+                print("💡 Please upload youtube_token.json to the repo")
+                sys.exit(1)
+
+            try:
+                creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
+            except ValueError:
+                if migrated:
+                    # Unusable conversion (e.g. no refresh token) - discard
+                    # it so the pickle is still there for the next attempt
+                    os.remove(self.token_file)
+                raise
+
+            # Drop the pickle only once the migrated JSON parses back
+            if migrated:
+                os.remove(self.legacy_token_file)
+
             # Refresh if expired
             if creds and creds.expired and creds.refresh_token:
                 print("🔄 Refreshing token...")
                 creds.refresh(Request())
-                
+
                 # Save refreshed token
-                with open(self.token_file, 'wb') as token:
-                    pickle.dump(creds, token)
+                with open(self.token_file, 'w') as f:
+                    f.write(creds.to_json())
             
+            self.creds = creds
             self.youtube = build('youtube', 'v3', credentials=creds)
-            
-            # Get channel info
-            channel_response = self.youtube.channels().list(
-                part='snippet',
-                mine=True
-            ).execute()
+
+            # Reuse cached channel info - saves one API round-trip and
+            # 1 quota unit per run (pass --refresh-channel to re-fetch)
+            force_refresh = '--refresh-channel' in sys.argv
+            cached_id = self.tracker.get('channel_id')
+            cached_name = self.tracker.get('channel_name')
+
+            if cached_id and cached_name and not force_refresh:
+                print(f"✅ Authenticated as: {cached_name} (cached)")
+                print(f"📺 Channel ID: {cached_id}")
+                return cached_id
+
+            # Get channel info (--refresh-channel bypasses the disk cache too)
+            params = {'part': 'snippet', 'mine': True}
+            channel_response = self._cached_api(
+                'channels.list', params,
+                lambda: self.youtube.channels().list(**params).execute(),
+                force=force_refresh
+            )
             
             if channel_response['items']:
                 channel = channel_response['items'][0]
                 channel_name = channel['snippet']['title']
                 channel_id = channel['id']
+                self.tracker['channel_id'] = channel_id
+                self.tracker['channel_name'] = channel_name
                 print(f"✅ Authenticated as: {channel_name}")
                 print(f"📺 Channel ID: {channel_id}")
                 return channel_id
@@ -157,20 +334,87 @@ class YouTubeUploader:
             print(f"❌ Authentication failed: {e}")
             sys.exit(1)
     
-    def load_tracker(self, channel_id):
+    def _thread_http(self):
+        """Authorized httplib2 client owned by the calling thread
+
+        The service built in authenticate() carries one shared
+        httplib2.Http, which must not be used from several threads at
+        once; API calls made off the main thread pass this instead.
+        """
+        if not hasattr(self._http_local, 'http'):
+            import httplib2
+            import google_auth_httplib2
+
+            self._http_local.http = google_auth_httplib2.AuthorizedHttp(
+                self.creds, http=httplib2.Http()
+            )
+        return self._http_local.http
+
+    def _cached_api(self, method, params, execute_fn, ttl=86400, force=False):
+        """Run a read-only API call through an on-disk cache (24h TTL)
+
+        Saves quota units and a round-trip on repeat lookups with the
+        same parameters. `force=True` skips the lookup and refreshes
+        the stored entry.
+        """
+        key = hashlib.sha1(
+            f"{method}:{json.dumps(params, sort_keys=True)}".encode()
+        ).hexdigest()
+
+        with shelve.open(self.api_cache_file) as cache:
+            if not force:
+                entry = cache.get(key)
+                if entry and time.time() - entry['ts'] < ttl:
+                    return entry['data']
+
+            data = execute_fn()
+            cache[key] = {'ts': time.time(), 'data': data}
+            return data
+
+    def queue_api_call(self, request, callback=None):
+        """Queue an API sub-request for the end-of-run batch"""
+        with self._batch_lock:
+            self._pending_batch.append((request, callback))
+
+    def flush_batch(self):
+        """Send all queued sub-requests as one HTTP batch (max 50/batch)"""
+        with self._batch_lock:
+            pending, self._pending_batch = self._pending_batch, []
+
+        if not pending:
+            return
+
+        from googleapiclient.http import BatchHttpRequest
+
+        def _default_cb(request_id, response, exception):
+            if exception is not None:
+                print(f"⚠️ Batched call #{request_id} failed: {str(exception)[:50]}")
+
+        print(f"\n📦 Sending {len(pending)} batched API call(s)...")
+        batch = BatchHttpRequest(batch_uri='https://youtube.googleapis.com/batch')
+        for request, callback in pending:
+            batch.add(request, callback=callback or _default_cb)
+        batch.execute()
+
+    def load_tracker(self):
         """Load or create progress tracker"""
         if os.path.exists(self.tracker_file):
-            with open(self.tracker_file, 'r') as f:
-                self.tracker = json.load(f)
+            if orjson is not None:
+                with open(self.tracker_file, 'rb') as f:
+                    self.tracker = orjson.loads(f.read())
+            else:
+                with open(self.tracker_file, 'r') as f:
+                    self.tracker = json.load(f)
             print(f"\n📊 Progress loaded:")
             print(f"   Total uploaded: {self.tracker.get('uploaded_count', 0)} videos")
             print(f"   Last run: {self.tracker.get('last_run_date', 'Never')}")
         else:
             self.tracker = {
-                'channel_id': channel_id,
+                'channel_id': None,
                 'uploaded_count': 0,
                 'last_run_date': None,
-                'upload_history': []
+                'upload_history': [],
+                'drive_files': {}
             }
             print("\n📊 New tracker created")
     
@@ -181,27 +425,125 @@ class YouTubeUploader:
             print("💡 Create videos.txt with Google Drive links (one per line)")
             sys.exit(1)
         
-        with open(self.videos_file, 'r') as f:
-            links = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-        
+        links = []
+        with open(self.videos_file, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                pass  # empty file can't be mapped
+            else:
+                with mm:
+                    # Work on raw bytes; decode only the lines we keep
+                    for raw in mm.splitlines():
+                        line = raw.strip()
+                        if line and not line.startswith(b'#'):
+                            links.append(line.decode())
+
         print(f"\n📁 Videos in queue: {len(links)}")
         
         return links
     
     def extract_drive_file_id(self, url):
         """Extract file ID from Google Drive URL"""
-        patterns = [
-            r'/file/d/([a-zA-Z0-9_-]+)',
-            r'id=([a-zA-Z0-9_-]+)',
-            r'/d/([a-zA-Z0-9_-]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
+        match = _DRIVE_ID_RE.search(url)
+        if match:
+            return match.group(1)
         return None
     
+    def _file_sha256(self, path):
+        """Stream a file's SHA-256 digest"""
+        with open(path, 'rb') as f:
+            if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+
+            digest = hashlib.sha256()
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+            return digest.hexdigest()
+
+    def _find_duplicate_upload(self, file_id, digest):
+        """Find an already-uploaded Drive file with identical content"""
+        for other_id, entry in self.tracker.get('drive_files', {}).items():
+            if other_id != file_id and entry.get('digest') == digest and entry.get('video_id'):
+                return entry
+        return None
+
+    def _video_already_uploaded(self, video_id):
+        """Check whether a previously recorded upload succeeded on YouTube"""
+        try:
+            response = self.youtube.videos().list(
+                part='status',
+                id=video_id
+            ).execute(http=self._thread_http())
+
+            items = response.get('items')
+            if not items:
+                return False
+
+            # A video that exists but was rejected/failed (duplicate,
+            # processing error, ...) should be re-uploaded, not skipped
+            upload_status = items[0].get('status', {}).get('uploadStatus')
+            return upload_status in ('uploaded', 'processed')
+        except Exception as e:
+            print(f"⚠️ Could not verify video {video_id}: {str(e)[:50]}")
+            return False
+
+    def _drive_download(self, file_id, output):
+        """Download a Drive file over the pooled session, resuming partials"""
+        url = 'https://drive.google.com/uc'
+        params = {'export': 'download', 'id': file_id}
+
+        # Resume into an existing partial file if there is one
+        existing = os.path.getsize(output) if os.path.exists(output) else 0
+        headers = {'Range': f'bytes={existing}-'} if existing else {}
+
+        response = self.http.get(url, params=params, headers=headers,
+                                 stream=True, timeout=(5, 30))
+
+        # 416: the leftover file already covers the whole range - keep it
+        if existing and response.status_code == 416:
+            response.close()
+            return output
+
+        # Large files come back as an HTML interstitial with a confirm token
+        if 'text/html' in response.headers.get('Content-Type', ''):
+            token = None
+            for key, value in response.cookies.items():
+                if key.startswith('download_warning'):
+                    token = value
+                    break
+
+            if token is None:
+                match = re.search(r'confirm=([0-9A-Za-z_-]+)', response.text)
+                if match:
+                    token = match.group(1)
+
+            if token is None:
+                raise RuntimeError("could not find Drive confirm token")
+
+            response.close()
+            params['confirm'] = token
+            response = self.http.get(url, params=params, headers=headers,
+                                     stream=True, timeout=(5, 30))
+
+            # Still HTML after confirming? The current Drive flow serves
+            # large files elsewhere - bail out so the gdown fallback runs
+            # instead of an HTML page being saved as the video
+            if 'text/html' in response.headers.get('Content-Type', ''):
+                response.close()
+                raise RuntimeError("Drive confirm retry still returned HTML")
+
+        response.raise_for_status()
+
+        if existing and response.status_code != 206:
+            existing = 0  # server ignored the Range header; start over
+
+        with open(output, 'ab' if existing else 'wb') as f:
+            for chunk in response.iter_content(1 << 20):
+                f.write(chunk)
+
+        return output
+
     def download_video(self, drive_url, index):
         """Download video from Google Drive"""
         file_id = self.extract_drive_file_id(drive_url)
@@ -214,13 +556,19 @@ class YouTubeUploader:
         print(f"   File ID: {file_id}")
         
         try:
-            import gdown
-            
             output = f"video_{index + 1}.mp4"
-            url = f"https://drive.google.com/uc?id={file_id}"
-            
-            gdown.download(url, output, quiet=False, fuzzy=True)
-            
+
+            # Direct download reuses the pooled TLS connection between videos
+            # and resumes partial files; gdown stays as the fallback
+            try:
+                self._drive_download(file_id, output)
+            except Exception as e:
+                print(f"⚠️ Direct download failed ({str(e)[:50]}), trying gdown...")
+                import gdown
+
+                url = f"https://drive.google.com/uc?id={file_id}"
+                gdown.download(url, output, quiet=False, fuzzy=True)
+
             if os.path.exists(output):
                 size_mb = os.path.getsize(output) / (1024 * 1024)
                 
@@ -230,6 +578,13 @@ class YouTubeUploader:
                     return None
                 
                 print(f"✅ Downloaded: {size_mb:.1f} MB")
+
+                # Record content hash so retry runs can recognize the file
+                digest = self._file_sha256(output)
+                entry = self.tracker.setdefault('drive_files', {}).setdefault(file_id, {})
+                entry['digest'] = digest
+                entry['ts'] = time.time()
+
                 return output
             else:
                 print("❌ Download failed")
@@ -241,47 +596,44 @@ class YouTubeUploader:
     
     def calculate_schedule_time(self, video_index):
         """Calculate schedule time (6 months from today + time)"""
-        now = datetime.now()
-        
-        # Add 6 months
-        schedule_date = now + timedelta(days=180)
-        
-        # Parse schedule time (20:00)
-        hour, minute = map(int, self.schedule_time.split(':'))
-        
+        # Add 6 months (base time captured once per run)
+        schedule_date = self._base_now + timedelta(days=180)
+
         # Add gap for each video (0, 15, 30 minutes)
         gap = (video_index % self.videos_per_day) * self.schedule_gap_minutes
-        minute += gap
-        
-        # Adjust hour if minutes overflow
-        if minute >= 60:
-            hour += minute // 60
-            minute = minute % 60
-        
+        hour = self._sched_hour + (self._sched_minute + gap) // 60
+        minute = (self._sched_minute + gap) % 60
+
         schedule_datetime = schedule_date.replace(
             hour=hour,
             minute=minute,
             second=0,
             microsecond=0
         )
-        
-        # Convert to ISO 8601 format (UTC)
-        # Bangladesh is UTC+6, so subtract 6 hours
-        utc_datetime = schedule_datetime - timedelta(hours=6)
-        
-        return utc_datetime.strftime('%Y-%m-%dT%H:%M:%S.000Z'), schedule_datetime
+
+        # Convert to ISO 8601 format (UTC) via tzinfo - no manual -6h math
+        utc_datetime = schedule_datetime.astimezone(timezone.utc)
+
+        # Display string from the precomputed date - no per-video strftime
+        hour12 = (hour - 1) % 12 + 1
+        ampm = 'PM' if hour >= 12 else 'AM'
+        display = f"{self._sched_date_str} {hour12:02d}:{minute:02d} {ampm}"
+
+        return utc_datetime.strftime('%Y-%m-%dT%H:%M:%S.000Z'), schedule_datetime, display
     
     def upload_video(self, video_path, video_index):
         """Upload video to YouTube"""
-        
+        from googleapiclient.errors import HttpError
+        from googleapiclient.http import MediaIoBaseUpload
+
         # Get video title from filename
         title = Path(video_path).stem  # Remove .mp4 extension
         
         # Calculate schedule time
-        schedule_time_utc, schedule_time_bd = self.calculate_schedule_time(video_index)
-        
+        schedule_time_utc, schedule_time_bd, schedule_display = self.calculate_schedule_time(video_index)
+
         print(f"\n📤 Uploading: {title}")
-        print(f"📅 Schedule: {schedule_time_bd.strftime('%Y-%m-%d %I:%M %p')} BD Time")
+        print(f"📅 Schedule: {schedule_display} BD Time")
         
         try:
             # Video metadata
@@ -299,34 +651,63 @@ class YouTubeUploader:
                 }
             }
             
-            # Upload
-            media = MediaFileUpload(
-                video_path,
-                chunksize=50*1024*1024,  # 50MB chunks
-                resumable=True
-            )
-            
-            request = self.youtube.videos().insert(
-                part='snippet,status',
-                body=body,
-                media_body=media
-            )
-            
-            print("⏳ Uploading... (this may take several minutes)")
-            
-            response = None
-            while response is None:
-                status, response = request.next_chunk()
-                if status:
-                    progress = int(status.progress() * 100)
-                    print(f"   Progress: {progress}%", end='\r')
-            
+            # Upload - single-shot for small files, big chunks otherwise
+            filesize = os.path.getsize(video_path)
+            chunksize = -1 if filesize < 128*1024*1024 else 100*1024*1024
+
+            # 4 MB read buffer + sequential readahead hint: far fewer
+            # syscalls than the default 8 KB reads while chunks are built
+            fh = io.BufferedReader(open(video_path, 'rb'), buffer_size=4*1024*1024)
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+            try:
+                media = MediaIoBaseUpload(
+                    fh,
+                    mimetype='video/mp4',
+                    chunksize=chunksize,
+                    resumable=True
+                )
+
+                request = self.youtube.videos().insert(
+                    part='snippet,status',
+                    body=body,
+                    media_body=media
+                )
+
+                print("⏳ Uploading... (this may take several minutes)")
+
+                response = None
+                retries = 0
+                while response is None:
+                    try:
+                        status, response = request.next_chunk(http=self._thread_http())
+                    except (HttpError, IncompleteRead, ConnectionError) as e:
+                        # Only server-side errors are worth retrying
+                        if isinstance(e, HttpError) and e.resp.status < 500:
+                            raise
+
+                        retries += 1
+                        if retries > 5:
+                            raise
+
+                        wait = 2 ** retries
+                        print(f"\n⚠️ Chunk failed ({str(e)[:50]}), retrying in {wait}s...")
+                        time.sleep(wait)
+                        continue
+
+                    if status:
+                        progress = int(status.progress() * 100)
+                        print(f"   Progress: {progress}%", end='\r')
+            finally:
+                fh.close()
+
             video_id = response['id']
             video_url = f"https://www.youtube.com/watch?v={video_id}"
             
             print(f"\n✅ Upload complete!")
             print(f"🔗 Video URL: {video_url}")
-            print(f"📅 Will be published: {schedule_time_bd.strftime('%Y-%m-%d %I:%M %p')} BD")
+            print(f"📅 Will be published: {schedule_display} BD")
             
             return {
                 'video_id': video_id,
@@ -340,57 +721,52 @@ class YouTubeUploader:
             return None
     
     def remove_uploaded_links(self, count):
-        """Remove first N uploaded links from videos.txt"""
+        """Remove first N uploaded links from videos.txt
+
+        Returns the number of links left in the queue, or -1 on failure.
+        """
         try:
             print(f"\n🗑️ Cleaning up videos.txt...")
             print(f"   Removing first {count} uploaded links...")
             
-            # Read all lines
-            with open(self.videos_file, 'r') as f:
-                lines = f.readlines()
-            
-            # Separate video links from comments/empty lines
-            video_lines = []
-            other_lines = []
-            
-            for line in lines:
-                if line.strip() and not line.strip().startswith('#'):
-                    video_lines.append(line)
-                else:
-                    other_lines.append(line)
-            
-            # Remove first N video links
-            if len(video_lines) >= count:
-                removed = video_lines[:count]
-                remaining_videos = video_lines[count:]
-                
-                for i in range(count):
-                    print(f"   ✅ Removed: Link #{i + 1}")
-                
-                # Write back (comments + remaining videos)
-                with open(self.videos_file, 'w') as f:
-                    # Write comments first
-                    for line in other_lines:
-                        f.write(line)
-                    # Write remaining videos
-                    for line in remaining_videos:
-                        f.write(line)
-                
-                print(f"   📊 Remaining links: {len(remaining_videos)}")
-                return True
-            else:
-                print(f"   ⚠️ Expected {count} links but found {len(video_lines)}")
-                return False
-            
+            # Single streaming pass: skip the first N video links, copy
+            # everything else verbatim (comments keep their positions),
+            # then swap the temp file into place atomically
+            skipped = 0
+            remaining = 0
+
+            with open(self.videos_file, 'r') as src, \
+                 tempfile.NamedTemporaryFile('w', dir='.', delete=False) as dst:
+                tmp_name = dst.name
+                for line in src:
+                    if line.strip() and not line.strip().startswith('#'):
+                        if skipped < count:
+                            skipped += 1
+                            print(f"   ✅ Removed: Link #{skipped}")
+                            continue
+                        remaining += 1
+                    dst.write(line)
+
+            if skipped < count:
+                print(f"   ⚠️ Expected {count} links but found {skipped}")
+                os.remove(tmp_name)
+                return -1
+
+            os.replace(tmp_name, self.videos_file)
+            print(f"   📊 Remaining links: {remaining}")
+            return remaining
+
         except Exception as e:
             print(f"   ⚠️ Could not update videos.txt: {e}")
             import traceback
             traceback.print_exc()
-            return False
+            return -1
     
     def run(self):
         """Main execution"""
-        
+        self._base_now = datetime.now(self._bd_tz)
+        self._sched_date_str = (self._base_now + timedelta(days=180)).strftime('%Y-%m-%d')
+
         # Show IP info
         print("\n🌍 Upload Location Info:")
         ip_info = self.get_my_ip_info()
@@ -398,12 +774,12 @@ class YouTubeUploader:
         print(f"   Location: {ip_info['city']}, {ip_info['region']}, {ip_info['country']}")
         print(f"   ISP: {ip_info['org']}")
         
+        # Load tracker first so authenticate() can reuse cached channel info
+        self.load_tracker()
+
         # Authenticate
         channel_id = self.authenticate()
         
-        # Load tracker
-        self.load_tracker(channel_id)
-        
         # Load video links (always from beginning since we delete uploaded ones)
         video_links = self.load_video_links()
         
@@ -425,69 +801,165 @@ class YouTubeUploader:
         print("🚀 Starting upload process...")
         print("="*70)
         
-        # Upload videos
+        # Upload videos - downloads and uploads run as a pipeline so the
+        # uploader is never idle while the next file is still downloading
         upload_results = []
-        
-        for i, drive_url in enumerate(today_videos):
+        results_lock = threading.Lock()
+        work_queue = queue.Queue(maxsize=2)  # bounds videos held on disk
+
+        def download_worker(index, drive_url):
             print(f"\n{'='*70}")
-            print(f"📹 Video {i + 1}/{today_count} (Total uploaded: {self.tracker['uploaded_count'] + i + 1})")
+            print(f"📹 Video {index + 1}/{today_count}")
             print(f"{'='*70}")
-            
-            # Download
-            video_path = self.download_video(drive_url, i)
-            
+
+            # Skip files a previous (possibly failed) run already uploaded
+            file_id = self.extract_drive_file_id(drive_url)
+            cached = self.tracker.get('drive_files', {}).get(file_id) if file_id else None
+
+            if cached and cached.get('video_id'):
+                if self._video_already_uploaded(cached['video_id']):
+                    print(f"⏭️ Already uploaded as {cached['video_id']} - skipping")
+                    with results_lock:
+                        upload_results.append({
+                            'video_id': cached['video_id'],
+                            'title': cached.get('title', f"video_{index + 1}"),
+                            'url': f"https://www.youtube.com/watch?v={cached['video_id']}",
+                            'scheduled_time': cached.get('scheduled_time', '')
+                        })
+                    return
+
+            video_path = self.download_video(drive_url, index)
+
             if not video_path:
                 print("⚠️ Skipping this video...")
-                continue
-            
-            # Upload
-            result = self.upload_video(video_path, i)
-            
-            if result:
-                upload_results.append(result)
-                self.tracker['uploaded_count'] += 1
-            
-            # Cleanup
-            try:
-                os.remove(video_path)
-                print(f"🗑️ Cleaned up temporary file")
-            except:
-                pass
-        
+                return
+
+            # Same content under a different Drive id? Reuse that upload
+            digest = self.tracker.get('drive_files', {}).get(file_id, {}).get('digest') if file_id else None
+            dup = self._find_duplicate_upload(file_id, digest) if digest else None
+
+            if dup and self._video_already_uploaded(dup['video_id']):
+                print(f"⏭️ Identical content already uploaded as {dup['video_id']} - skipping")
+                try:
+                    os.remove(video_path)
+                except OSError:
+                    pass
+
+                entry = self.tracker['drive_files'][file_id]
+                entry['video_id'] = dup['video_id']
+                entry['title'] = dup.get('title', f"video_{index + 1}")
+                entry['scheduled_time'] = dup.get('scheduled_time', '')
+
+                with results_lock:
+                    upload_results.append({
+                        'video_id': dup['video_id'],
+                        'title': entry['title'],
+                        'url': f"https://www.youtube.com/watch?v={dup['video_id']}",
+                        'scheduled_time': entry['scheduled_time']
+                    })
+                return
+
+            work_queue.put((index, video_path, file_id))
+
+        def upload_worker():
+            while True:
+                item = work_queue.get()
+                if item is None:
+                    break
+
+                index, video_path, file_id = item
+
+                try:
+                    result = self.upload_video(video_path, index)
+
+                    if result:
+                        with results_lock:
+                            upload_results.append(result)
+                            self.tracker['uploaded_count'] += 1
+
+                        if file_id:
+                            entry = self.tracker.setdefault('drive_files', {}).setdefault(file_id, {})
+                            entry['video_id'] = result['video_id']
+                            entry['title'] = result['title']
+                            entry['scheduled_time'] = result['scheduled_time']
+                            entry['ts'] = time.time()
+                finally:
+                    # Cleanup
+                    try:
+                        os.remove(video_path)
+                        print(f"🗑️ Cleaned up temporary file")
+                    except:
+                        pass
+
+        upload_pool = ThreadPoolExecutor(max_workers=self.videos_per_day)
+        upload_futures = [upload_pool.submit(upload_worker) for _ in range(self.videos_per_day)]
+
+        with ThreadPoolExecutor(max_workers=2) as download_pool:
+            download_futures = [
+                download_pool.submit(download_worker, i, drive_url)
+                for i, drive_url in enumerate(today_videos)
+            ]
+            for future in download_futures:
+                future.result()
+
+        # All downloads done - tell the upload workers to drain and stop
+        for _ in upload_futures:
+            work_queue.put(None)
+        upload_pool.shutdown(wait=True)
+        for future in upload_futures:
+            future.result()
+        
+        # Any post-upload metadata ops go out as a single round-trip
+        self.flush_batch()
+
         # Remove uploaded links from videos.txt (remove count from top)
         if upload_results:
-            self.remove_uploaded_links(len(upload_results))
+            remaining_count = self.remove_uploaded_links(len(upload_results))
+        else:
+            remaining_count = len(video_links)
         
         # Update tracker
         self.tracker['last_run_date'] = datetime.now().isoformat()
-        self.tracker['upload_history'].append({
+
+        history_entry = {
             'date': datetime.now().isoformat(),
             'videos': upload_results,
             'ip_info': ip_info
-        })
-        
+        }
+
+        # Full history lives in the append-only log; tracker.json keeps
+        # only a rolling window so it never grows unbounded
+        self.append_history(history_entry)
+        self.tracker['upload_history'].append(history_entry)
+        self.tracker['upload_history'] = self.tracker['upload_history'][-30:]
+
         self.save_tracker()
         
         # Save detailed IP log
         ip_log_file = f"ip_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        with open(ip_log_file, 'w') as f:
-            f.write("="*70 + "\n")
-            f.write(f"YouTube Upload Session - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("="*70 + "\n\n")
-            f.write(f"IP Address: {ip_info['ip']}\n")
-            f.write(f"City: {ip_info['city']}\n")
-            f.write(f"Region: {ip_info['region']}\n")
-            f.write(f"Country: {ip_info['country']}\n")
-            f.write(f"ISP/Organization: {ip_info['org']}\n\n")
-            f.write(f"Videos Uploaded: {len(upload_results)}\n")
-            f.write(f"Total Lifetime: {self.tracker['uploaded_count']} videos\n\n")
-            f.write("="*70 + "\n")
-            f.write("Video Details:\n")
-            f.write("="*70 + "\n")
-            for i, video in enumerate(upload_results, 1):
-                f.write(f"\n{i}. {video['title']}\n")
-                f.write(f"   URL: {video['url']}\n")
-                f.write(f"   Scheduled: {video['scheduled_time']}\n")
+        sep = "=" * 70
+        video_details = '\n'.join(
+            f"\n{i}. {video['title']}\n"
+            f"   URL: {video['url']}\n"
+            f"   Scheduled: {video['scheduled_time']}"
+            for i, video in enumerate(upload_results, 1)
+        )
+        Path(ip_log_file).write_text(
+            f"{sep}\n"
+            f"YouTube Upload Session - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"{sep}\n\n"
+            f"IP Address: {ip_info['ip']}\n"
+            f"City: {ip_info['city']}\n"
+            f"Region: {ip_info['region']}\n"
+            f"Country: {ip_info['country']}\n"
+            f"ISP/Organization: {ip_info['org']}\n\n"
+            f"Videos Uploaded: {len(upload_results)}\n"
+            f"Total Lifetime: {self.tracker['uploaded_count']} videos\n\n"
+            f"{sep}\n"
+            "Video Details:\n"
+            f"{sep}\n"
+            f"{video_details}\n"
+        )
         
         print(f"\n💾 IP log saved: {ip_log_file}")
         
@@ -499,10 +971,7 @@ class YouTubeUploader:
         print(f"   Uploaded: {len(upload_results)} videos")
         print(f"   Total uploaded (lifetime): {self.tracker['uploaded_count']}")
         
-        # Re-count remaining
-        with open(self.videos_file, 'r') as f:
-            remaining = sum(1 for line in f if line.strip() and not line.strip().startswith('#'))
-        print(f"   Remaining in queue: {remaining}")
+        print(f"   Remaining in queue: {remaining_count if remaining_count >= 0 else 'unknown'}")
         
         print(f"\n🌍 Uploaded from:")
         print(f"   IP Address: {ip_info['ip']}")
@@ -520,6 +989,8 @@ class YouTubeUploader:
         print("\n🗑️ Uploaded links removed from videos.txt")
         print("="*70)
 
+        self.http.close()
+
 def main():
     print("\n" + "="*70)
     print("🎬 YouTube Simple Video Uploader")